@@ -1,18 +1,26 @@
 # app.py
 from __future__ import annotations
 
+import asyncio
+import gzip
+import multiprocessing
 import os
-import datetime as dt
-from io import BytesIO
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from functools import partial
+from importlib.resources import files
+from mimetypes import guess_type
+from pathlib import Path
+from tempfile import NamedTemporaryFile
 from typing import Optional, List
 
 from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.openapi.docs import get_swagger_ui_html
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import StreamingResponse
 
 from sqlalchemy import (
     create_engine,
@@ -22,21 +30,72 @@ from sqlalchemy import (
     Date,
     Float,
     ForeignKey,
+    Index,
+    event,
     select,
 )
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker, Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, defer, relationship, sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
+from pydantic import BaseModel, ConfigDict
 from sqladmin import Admin, ModelView
-from sqladmin.authentication import AuthenticationBackend
+
+from app.auth import SimpleAuth
+from app.cors import OpenCORSMiddleware
 
 # --------------------------------------------------------------------------------------
 # DB setup (SQLite by default; set DATABASE_URL for Postgres etc.)
 # --------------------------------------------------------------------------------------
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fleet.db")
-engine_kwargs = {"connect_args": {"check_same_thread": False}} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, **engine_kwargs)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    engine_kwargs = {
+        "connect_args": {"check_same_thread": False},
+        "poolclass": QueuePool,
+        "pool_size": 5,
+        "max_overflow": 10,
+    }
+else:
+    # FastAPI runs sync endpoints on a 40-thread pool; 5 connections starve it.
+    engine_kwargs = {"pool_size": 25, "max_overflow": 25, "pool_recycle": 1800}
+
+# pre-ping costs a round-trip per checkout, so it is opt-in (DB_POOL_PRE_PING=1)
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "").lower() in ("1", "true", "yes")
+engine = create_engine(DATABASE_URL, pool_pre_ping=POOL_PRE_PING, **engine_kwargs)
+
+# The read-only list endpoints run on asyncio drivers so they don't hold a threadpool
+# slot per DB round-trip; everything else stays on the sync engine.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+_url = make_url(DATABASE_URL)
+ASYNC_DATABASE_URL = _url.set(drivername=ASYNC_DRIVERS.get(_url.get_backend_name(), _url.drivername))
+# Its own small pool: it only serves the list endpoints. Reusing the sync engine's 25+25
+# would allow 100 connections per worker, all of Postgres' default max_connections.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=POOL_PRE_PING,
+    **({} if IS_SQLITE else {"pool_size": 5, "max_overflow": 5, "pool_recycle": 1800}),
+)
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -48,6 +107,11 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # --------------------------------------------------------------------------------------
 # Models
 # --------------------------------------------------------------------------------------
@@ -67,6 +131,24 @@ class Equipment(Base):
 
     workorders = relationship("Workorder", back_populates="equipment")
 
+    __table_args__ = (
+        Index("ix_equipment_status", "status"),
+        # list_equipment_api does ILIKE '%...%' on these; only trigram GIN indexes
+        # (Postgres + pg_trgm) can serve a contains-match, so they are PG-only.
+        Index(
+            "ix_equipment_name_trgm",
+            "equipment_name",
+            postgresql_using="gin",
+            postgresql_ops={"equipment_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_equipment_camp_name_trgm",
+            "camp_name",
+            postgresql_using="gin",
+            postgresql_ops={"camp_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 class Workshop(Base):
     __tablename__ = "workshops"
@@ -90,19 +172,81 @@ class Workorder(Base):
     equipment = relationship("Equipment", back_populates="workorders")
 
 
-Base.metadata.create_all(bind=engine)
+SCHEMA_LOCK_ID = 0x666C656574  # "fleet"; arbitrary pg_advisory_xact_lock key
+
+
+def init_db() -> None:
+    """Create tables/indexes once per worker; on Postgres, workers take turns via an advisory lock."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})")
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        Base.metadata.create_all(bind=conn)
+        # create_all() skips tables that already exist, so add indexes introduced later explicitly
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+# --------------------------------------------------------------------------------------
+# API response schemas + the matching column projections for the list endpoints
+# --------------------------------------------------------------------------------------
+class EquipmentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    equipment_id: int
+    equipment_name: str
+    camp_name: str
+    region: Optional[str] = None
+    status: str
+    next_maintenance_date: Optional[date] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+class WorkshopOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    workshop_id: int
+    camp_name: str
+    location_lat: Optional[float] = None
+    location_lon: Optional[float] = None
+
+
+class WorkorderOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    workorder_number: int
+    equipment_id: int
+    workorder_description: Optional[str] = None
+    workshop_id: Optional[int] = None
+    maintenance_start_date: Optional[date] = None
+    maintenance_end_date: Optional[date] = None
+
+
+EQUIPMENT_COLUMNS = tuple(getattr(Equipment, name) for name in EquipmentOut.model_fields)
+WORKSHOP_COLUMNS = tuple(getattr(Workshop, name) for name in WorkshopOut.model_fields)
+WORKORDER_COLUMNS = tuple(getattr(Workorder, name) for name in WorkorderOut.model_fields)
 
 # --------------------------------------------------------------------------------------
 # App + middleware
 # --------------------------------------------------------------------------------------
-app = FastAPI(title="Fleet Management API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup doubles as pool warm-up: it checks out (and returns) a connection.
+    await run_in_threadpool(init_db)
+    if os.getenv("LAZY_IMPORTS", "").lower() not in ("1", "true", "yes"):
+        _pandas()  # also loads app.utils, xlsxwriter included
+    yield
+    await async_engine.dispose()
+    if _xlsx_pool is not None:
+        _xlsx_pool.shutdown()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+
+app = FastAPI(title="Fleet Management API", lifespan=lifespan)
+
+# open CORS with a precomputed header block; browsers cache preflights for a day
+app.add_middleware(OpenCORSMiddleware, max_age=86400)
 
 # Sessions for sqladmin
 app.add_middleware(SessionMiddleware, secret_key="super-secret")
@@ -112,33 +256,53 @@ app.add_middleware(SessionMiddleware, secret_key="super-secret")
 # --------------------------------------------------------------------------------------
 import swagger_ui_bundle  # noqa
 
-swagger_ui_dir = None
-try:
-    from importlib.resources import files as _files
-
-    swagger_ui_dir = str((_files(swagger_ui_bundle) / "swagger_ui_3"))
-except Exception:
-    try:
-        from swagger_ui_bundle import swagger_ui_3_path as _const_path  # type: ignore
 
-        swagger_ui_dir = _const_path
-    except Exception:
-        try:
-            import pkg_resources
+def _swagger_ui_candidates():
+    # swagger_ui_bundle has exposed its asset dir under different names across releases
+    for attr in ("swagger_ui_3_path", "swagger_ui_path"):
+        path = getattr(swagger_ui_bundle, attr, None)
+        if path:
+            yield str(path)
+    yield str(files(swagger_ui_bundle) / "swagger_ui_3")
 
-            swagger_ui_dir = os.path.join(
-                pkg_resources.resource_filename("swagger_ui_bundle", ""), "swagger_ui_3"
-            )
-        except Exception:
-            swagger_ui_dir = None
 
-if not swagger_ui_dir or not os.path.isdir(swagger_ui_dir):
+swagger_ui_dir = next((p for p in _swagger_ui_candidates() if os.path.isdir(p)), None)
+if not swagger_ui_dir:
     raise RuntimeError(
         "Could not locate Swagger UI assets in swagger_ui_bundle. "
         "Install or upgrade it:  pip install -U swagger-ui-bundle"
     )
 
-app.mount("/swagger-ui", StaticFiles(directory=swagger_ui_dir), name="swagger-ui")
+
+def _load_swagger_ui_assets(directory: str) -> dict[str, tuple[bytes, Optional[bytes], str]]:
+    """Read every servable asset once: name -> (body, gzipped body or None, media type).
+
+    Source maps and the Jinja template are skipped; they are ~12 MB nobody needs in prod.
+    """
+    assets = {}
+    for path in Path(directory).iterdir():
+        if not path.is_file() or path.suffix in (".map", ".j2"):
+            continue
+        body = path.read_bytes()
+        gz = gzip.compress(body)
+        media_type = guess_type(path.name)[0] or "application/octet-stream"
+        assets[path.name] = (body, gz if len(gz) < len(body) else None, media_type)
+    return assets
+
+
+SWAGGER_UI_ASSETS = _load_swagger_ui_assets(swagger_ui_dir)
+SWAGGER_UI_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+
+
+@app.get("/swagger-ui/{name}", include_in_schema=False)
+def swagger_ui_asset(name: str, request: Request):
+    asset = SWAGGER_UI_ASSETS.get(name)
+    if asset is None:
+        raise HTTPException(404, "Not Found")
+    body, gz, media_type = asset
+    if gz is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(gz, media_type=media_type, headers={**SWAGGER_UI_HEADERS, "Content-Encoding": "gzip"})
+    return Response(body, media_type=media_type, headers=SWAGGER_UI_HEADERS)
 
 
 @app.get("/docs", include_in_schema=False)
@@ -154,25 +318,6 @@ def local_docs():
 # --------------------------------------------------------------------------------------
 # SQLAdmin (simple session auth)
 # --------------------------------------------------------------------------------------
-class SimpleAuth(AuthenticationBackend):
-    def __init__(self, secret_key: str):
-        super().__init__(secret_key=secret_key)
-
-    async def login(self, request: Request) -> bool:
-        form = await request.form()
-        if form.get("username") == "admin" and form.get("password") == "secret":
-            request.session.update({"user": "admin"})
-            return True
-        return False
-
-    async def logout(self, request: Request) -> bool:
-        request.session.clear()
-        return True
-
-    async def authenticate(self, request: Request) -> bool:
-        return bool(request.session.get("user"))
-
-
 admin = Admin(app, engine, authentication_backend=SimpleAuth("super-secret"), base_url="/admin")
 
 
@@ -200,15 +345,19 @@ class WorkshopAdmin(ModelView, model=Workshop):
 
 
 class WorkorderAdmin(ModelView, model=Workorder):
+    # workorder_description is free text and can be large: the list page neither shows
+    # nor fetches it; the details/edit pages load the full row.
     column_list = [
         Workorder.workorder_number,
         Workorder.equipment_id,
-        Workorder.workorder_description,
         Workorder.workshop_id,
         Workorder.maintenance_start_date,
         Workorder.maintenance_end_date,
     ]
 
+    def list_query(self, request: Request):
+        return select(Workorder).options(defer(Workorder.workorder_description))
+
 
 admin.add_view(EquipmentAdmin)
 admin.add_view(WorkshopAdmin)
@@ -218,28 +367,70 @@ admin.add_view(WorkorderAdmin)
 # --------------------------------------------------------------------------------------
 # Helpers
 # --------------------------------------------------------------------------------------
-def parse_any_date(value):
-    """Accept dd-mm-yyyy / yyyy-mm-dd / dd/mm/yyyy / yyyy/mm/dd or Excel serial/date objects."""
-    if value in (None, "", "nan"):
-        return None
-    if isinstance(value, dt.date):
-        return value
-    if isinstance(value, dt.datetime):
-        return value.date()
-
-    s = str(value).strip()
-    for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"):
-        try:
-            return dt.datetime.strptime(s, fmt).date()
-        except Exception:
-            pass
-    # Excel serials
-    try:
-        serial = float(s)
-        excel_epoch = dt.datetime(1899, 12, 30)
-        return (excel_epoch + dt.timedelta(days=serial)).date()
-    except Exception:
-        return None
+# pandas takes ~200 ms to import, and app.utils (the upload column cleaners, shared with
+# the app/ package) imports it. Everything goes through _utils()/_pandas() so the modules
+# are resolved once; lifespan() pays that cost per worker before the first request
+# unless LAZY_IMPORTS=1 (for cold-start sensitive deployments).
+_utils_module = None
+
+
+def _utils():
+    global _utils_module
+    if _utils_module is None:
+        from app import utils
+
+        _utils_module = utils
+    return _utils_module
+
+
+def _pandas():
+    return _utils().pd
+
+
+def _bulk_write(db: Session, table, records: list[dict]) -> int:
+    """Insert `records` as one Core executemany and commit; returns the row count.
+
+    The batch shares a single transaction (one journal sync) with anything the caller has
+    already read on `db`, and skips ORM bookkeeping and PK fetch-back.
+    """
+    if records:
+        db.execute(table.insert(), records)
+    db.commit()
+    return len(records)
+
+
+# Workbook parsing is CPU-bound and holds the GIL, so it runs in worker processes
+# (created on first upload; XLSX_WORKERS overrides the size). Workers come from a
+# forkserver rather than fork(), which would copy this threaded process mid-lock, and
+# the pool stays small because each one loads pandas.
+_xlsx_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _xlsx_executor() -> ProcessPoolExecutor:
+    global _xlsx_pool
+    if _xlsx_pool is None:
+        _xlsx_pool = ProcessPoolExecutor(
+            max_workers=int(os.getenv("XLSX_WORKERS", 2)),
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _xlsx_pool
+
+
+async def read_excel_upload(file: UploadFile):
+    """Parse an uploaded workbook in a worker process so neither the event loop nor the GIL is held.
+
+    Starlette has already spooled the upload; it is copied in 64 KB chunks to a named temp
+    file (off the event loop) so the worker can open it by path.
+    """
+    pd, utils = _pandas(), _utils()
+
+    with NamedTemporaryFile(suffix=".xlsx") as tmp:
+        await file.seek(0)
+        await run_in_threadpool(shutil.copyfileobj, file.file, tmp, 64 * 1024)
+        tmp.flush()
+        loop = asyncio.get_running_loop()
+        parse = partial(pd.read_excel, tmp.name, engine=utils.XLSX_ENGINE, dtype=object)
+        return await loop.run_in_executor(_xlsx_executor(), parse)
 
 
 def html_upload_form(title: str, action: str, back_to: str, extra_hint: str = "") -> str:
@@ -275,67 +466,47 @@ def html_upload_form(title: str, action: str, back_to: str, extra_hint: str = ""
 """
 
 
-def excel_response(df, filename: str) -> StreamingResponse:
-    import pandas as pd  # lazy import
-
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False)
-    buf.seek(0)
-    return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
-
-
 # --------------------------------------------------------------------------------------
 # Upload forms (GET) – one per table
 # --------------------------------------------------------------------------------------
+# The forms carry no per-request data, so render them once at import.
+EQUIPMENT_FORM_HTML = html_upload_form(
+    "Upload Equipments (.xlsx)",
+    "/upload/equipment",
+    "/admin/equipment/list",
+    "Columns (case-insensitive): equipment_name*, camp_name*, region, "
+    "status (ReadyToUse/UnderMaintenance/Allocated), "
+    "next_maintenance_date, start_date, end_date",
+)
+WORKSHOPS_FORM_HTML = html_upload_form(
+    "Upload Workshops (.xlsx)",
+    "/upload/workshops",
+    "/admin/workshops/list",
+    "Columns: camp_name*, location_lat, location_lon",
+)
+WORKORDERS_FORM_HTML = html_upload_form(
+    "Upload Workorders (.xlsx)",
+    "/upload/workorders",
+    "/admin/workorders/list",
+    "Columns: equipment_id*, workorder_description, workshop_id, "
+    "maintenance_start_date, maintenance_end_date",
+)
+FORM_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+
 @app.get("/admin/equipment/upload", response_class=HTMLResponse)
 def form_equipment_upload():
-    hint = (
-        "Columns (case-insensitive): equipment_name*, camp_name*, region, "
-        "status (ReadyToUse/UnderMaintenance/Allocated), "
-        "next_maintenance_date, start_date, end_date"
-    )
-    return HTMLResponse(
-        html_upload_form(
-            "Upload Equipments (.xlsx)",
-            "/upload/equipment",
-            "/admin/equipment/list",
-            hint,
-        )
-    )
+    return HTMLResponse(EQUIPMENT_FORM_HTML, headers=FORM_HEADERS)
 
 
 @app.get("/admin/workshops/upload", response_class=HTMLResponse)
 def form_workshops_upload():
-    hint = "Columns: camp_name*, location_lat, location_lon"
-    return HTMLResponse(
-        html_upload_form(
-            "Upload Workshops (.xlsx)",
-            "/upload/workshops",
-            "/admin/workshops/list",
-            hint,
-        )
-    )
+    return HTMLResponse(WORKSHOPS_FORM_HTML, headers=FORM_HEADERS)
 
 
 @app.get("/admin/workorders/upload", response_class=HTMLResponse)
 def form_workorders_upload():
-    hint = (
-        "Columns: equipment_id*, workorder_description, workshop_id, "
-        "maintenance_start_date, maintenance_end_date"
-    )
-    return HTMLResponse(
-        html_upload_form(
-            "Upload Workorders (.xlsx)",
-            "/upload/workorders",
-            "/admin/workorders/list",
-            hint,
-        )
-    )
+    return HTMLResponse(WORKORDERS_FORM_HTML, headers=FORM_HEADERS)
 
 
 # --------------------------------------------------------------------------------------
@@ -343,37 +514,39 @@ def form_workorders_upload():
 # --------------------------------------------------------------------------------------
 @app.post("/upload/equipment")
 async def upload_equipment(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    import pandas as pd  # lazy
+    pd, utils = _pandas(), _utils()
 
     if not file.filename.lower().endswith((".xlsx", ".xlsm", ".xltx", ".xltm")):
         raise HTTPException(400, "Please upload an Excel .xlsx/.xlsm file")
 
-    df = pd.read_excel(BytesIO(await file.read()))
+    df = await read_excel_upload(file)
     df.columns = [str(c).strip().lower() for c in df.columns]
     required = {"equipment_name", "camp_name"}
     missing = required - set(df.columns)
     if missing:
         raise HTTPException(400, f"Missing required columns: {', '.join(sorted(missing))}")
 
-    inserted, errors = 0, []
-    for i, row in df.iterrows():
-        try:
-            e = Equipment(
-                equipment_name=str(row["equipment_name"]).strip(),
-                camp_name=str(row["camp_name"]).strip(),
-                region=(str(row["region"]).strip() if "region" in df.columns and pd.notna(row.get("region")) else None),
-                status=(str(row["status"]).strip() if "status" in df.columns and pd.notna(row.get("status")) else "ReadyToUse"),
-                next_maintenance_date=parse_any_date(row.get("next_maintenance_date")) if "next_maintenance_date" in df.columns else None,
-                start_date=parse_any_date(row.get("start_date")) if "start_date" in df.columns else None,
-                end_date=parse_any_date(row.get("end_date")) if "end_date" in df.columns else None,
-            )
-            if not e.equipment_name or not e.camp_name:
-                raise ValueError("equipment_name and camp_name are mandatory")
-            db.add(e)
-            inserted += 1
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-    db.commit()
+    clean = pd.DataFrame(
+        {
+            "equipment_name": utils.str_column(df, "equipment_name"),
+            "camp_name": utils.str_column(df, "camp_name"),
+            "region": utils.str_column(df, "region"),
+            "status": utils.str_column(df, "status").fillna("ReadyToUse"),
+            "next_maintenance_date": utils.date_column(df, "next_maintenance_date"),
+            "start_date": utils.date_column(df, "start_date"),
+            "end_date": utils.date_column(df, "end_date"),
+        }
+    )
+    bad, errors = utils.row_errors(
+        [
+            (
+                clean["equipment_name"].isna() | clean["camp_name"].isna(),
+                "equipment_name and camp_name are mandatory",
+            ),
+        ]
+    )
+
+    inserted = _bulk_write(db, Equipment.__table__, clean[~bad].to_dict(orient="records"))
 
     msg = f"Inserted: {inserted}. Errors: {len(errors)}"
     html = f"""
@@ -390,33 +563,36 @@ async def upload_equipment(file: UploadFile = File(...), db: Session = Depends(g
 
 @app.post("/upload/workshops")
 async def upload_workshops(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    import pandas as pd  # lazy
+    pd, utils = _pandas(), _utils()
 
     if not file.filename.lower().endswith((".xlsx", ".xlsm", ".xltx", ".xltm")):
         raise HTTPException(400, "Please upload an Excel .xlsx/.xlsm file")
 
-    df = pd.read_excel(BytesIO(await file.read()))
+    df = await read_excel_upload(file)
     df.columns = [str(c).strip().lower() for c in df.columns]
     required = {"camp_name"}
     missing = required - set(df.columns)
     if missing:
         raise HTTPException(400, f"Missing required columns: {', '.join(sorted(missing))}")
 
-    inserted, errors = 0, []
-    for i, row in df.iterrows():
-        try:
-            ws = Workshop(
-                camp_name=str(row["camp_name"]).strip(),
-                location_lat=float(row["location_lat"]) if "location_lat" in df.columns and pd.notna(row.get("location_lat")) else None,
-                location_lon=float(row["location_lon"]) if "location_lon" in df.columns and pd.notna(row.get("location_lon")) else None,
-            )
-            if not ws.camp_name:
-                raise ValueError("camp_name is mandatory")
-            db.add(ws)
-            inserted += 1
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-    db.commit()
+    lat, bad_lat = utils.num_column(df, "location_lat")
+    lon, bad_lon = utils.num_column(df, "location_lon")
+    clean = pd.DataFrame(
+        {
+            "camp_name": utils.str_column(df, "camp_name"),
+            "location_lat": lat,
+            "location_lon": lon,
+        }
+    )
+    bad, errors = utils.row_errors(
+        [
+            (clean["camp_name"].isna(), "camp_name is mandatory"),
+            (bad_lat, "location_lat must be numeric"),
+            (bad_lon, "location_lon must be numeric"),
+        ]
+    )
+
+    inserted = _bulk_write(db, Workshop.__table__, clean[~bad].to_dict(orient="records"))
 
     msg = f"Inserted: {inserted}. Errors: {len(errors)}"
     html = f"""
@@ -433,33 +609,45 @@ async def upload_workshops(file: UploadFile = File(...), db: Session = Depends(g
 
 @app.post("/upload/workorders")
 async def upload_workorders(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    import pandas as pd  # lazy
+    pd, utils = _pandas(), _utils()
 
     if not file.filename.lower().endswith((".xlsx", ".xlsm", ".xltx", ".xltm")):
         raise HTTPException(400, "Please upload an Excel .xlsx/.xlsm file")
 
-    df = pd.read_excel(BytesIO(await file.read()))
+    df = await read_excel_upload(file)
     df.columns = [str(c).strip().lower() for c in df.columns]
     required = {"equipment_id"}
     missing = required - set(df.columns)
     if missing:
         raise HTTPException(400, f"Missing required columns: {', '.join(sorted(missing))}")
 
-    inserted, errors = 0, []
-    for i, row in df.iterrows():
-        try:
-            wo = Workorder(
-                equipment_id=int(row["equipment_id"]),
-                workorder_description=(str(row["workorder_description"]).strip() if "workorder_description" in df.columns and pd.notna(row.get("workorder_description")) else None),
-                workshop_id=(int(row["workshop_id"]) if "workshop_id" in df.columns and pd.notna(row.get("workshop_id")) else None),
-                maintenance_start_date=parse_any_date(row.get("maintenance_start_date")) if "maintenance_start_date" in df.columns else None,
-                maintenance_end_date=parse_any_date(row.get("maintenance_end_date")) if "maintenance_end_date" in df.columns else None,
-            )
-            db.add(wo)
-            inserted += 1
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-    db.commit()
+    equipment_id, bad_eq = utils.num_column(df, "equipment_id", int)
+    workshop_id, bad_ws = utils.num_column(df, "workshop_id", int)
+    clean = pd.DataFrame(
+        {
+            "equipment_id": equipment_id,
+            "workorder_description": utils.str_column(df, "workorder_description"),
+            "workshop_id": workshop_id,
+            "maintenance_start_date": utils.date_column(df, "maintenance_start_date"),
+            "maintenance_end_date": utils.date_column(df, "maintenance_end_date"),
+        }
+    )
+    # Two id-set builds replace per-row FK lookups (or a torn commit on a bad FK)
+    valid_eq = set(db.scalars(select(Equipment.equipment_id)))
+    valid_ws = set(db.scalars(select(Workshop.workshop_id)))
+    eq_given = clean["equipment_id"].notna()
+    ws_given = clean["workshop_id"].notna()
+    bad, errors = utils.row_errors(
+        [
+            (~eq_given & ~bad_eq, "equipment_id is mandatory"),
+            (bad_eq, "equipment_id must be an integer"),
+            (bad_ws, "workshop_id must be an integer"),
+            (eq_given & ~clean["equipment_id"].isin(valid_eq), "unknown equipment_id"),
+            (ws_given & ~clean["workshop_id"].isin(valid_ws), "unknown workshop_id"),
+        ]
+    )
+
+    inserted = _bulk_write(db, Workorder.__table__, clean[~bad].to_dict(orient="records"))
 
     msg = f"Inserted: {inserted}. Errors: {len(errors)}"
     html = f"""
@@ -479,127 +667,51 @@ async def upload_workorders(file: UploadFile = File(...), db: Session = Depends(
 # --------------------------------------------------------------------------------------
 @app.get("/equipment/export.xlsx")
 def export_equipment(db: Session = Depends(get_db)):
-    import pandas as pd  # lazy
-
-    rows = db.execute(select(Equipment)).scalars().all()
-    df = pd.DataFrame(
-        [
-            dict(
-                equipment_id=r.equipment_id,
-                equipment_name=r.equipment_name,
-                camp_name=r.camp_name,
-                region=r.region,
-                status=r.status,
-                next_maintenance_date=r.next_maintenance_date,
-                start_date=r.start_date,
-                end_date=r.end_date,
-            )
-            for r in rows
-        ]
-    )
-    return excel_response(df, "equipment.xlsx")
+    result = db.execute(select(*EQUIPMENT_COLUMNS).execution_options(yield_per=1000))
+    return _utils().excel_response(result.keys(), result, "equipment.xlsx")
 
 
 @app.get("/workshops/export.xlsx")
 def export_workshops(db: Session = Depends(get_db)):
-    import pandas as pd
-
-    rows = db.execute(select(Workshop)).scalars().all()
-    df = pd.DataFrame(
-        [
-            dict(
-                workshop_id=r.workshop_id,
-                camp_name=r.camp_name,
-                location_lat=r.location_lat,
-                location_lon=r.location_lon,
-            )
-            for r in rows
-        ]
-    )
-    return excel_response(df, "workshops.xlsx")
+    result = db.execute(select(*WORKSHOP_COLUMNS).execution_options(yield_per=1000))
+    return _utils().excel_response(result.keys(), result, "workshops.xlsx")
 
 
 @app.get("/workorders/export.xlsx")
 def export_workorders(db: Session = Depends(get_db)):
-    import pandas as pd
-
-    rows = db.execute(select(Workorder)).scalars().all()
-    df = pd.DataFrame(
-        [
-            dict(
-                workorder_number=r.workorder_number,
-                equipment_id=r.equipment_id,
-                workorder_description=r.workorder_description,
-                workshop_id=r.workshop_id,
-                maintenance_start_date=r.maintenance_start_date,
-                maintenance_end_date=r.maintenance_end_date,
-            )
-            for r in rows
-        ]
-    )
-    return excel_response(df, "workorders.xlsx")
+    result = db.execute(select(*WORKORDER_COLUMNS).execution_options(yield_per=1000))
+    return _utils().excel_response(result.keys(), result, "workorders.xlsx")
 
 
 # --------------------------------------------------------------------------------------
 # Minimal REST list endpoints (optional) just to have something in /docs
 # --------------------------------------------------------------------------------------
-@app.get("/equipment", response_model=List[dict])
-def list_equipment_api(
+@app.get("/equipment", response_model=List[EquipmentOut])
+async def list_equipment_api(
     equipment_name: Optional[str] = None,
     camp_name: Optional[str] = None,
     status: Optional[str] = None,
     limit: int = 200,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(Equipment)
+    stmt = select(*EQUIPMENT_COLUMNS)
     if equipment_name:
-        q = q.filter(Equipment.equipment_name.ilike(f"%{equipment_name}%"))
+        stmt = stmt.where(Equipment.equipment_name.ilike(f"%{equipment_name}%"))
     if camp_name:
-        q = q.filter(Equipment.camp_name.ilike(f"%{camp_name}%"))
+        stmt = stmt.where(Equipment.camp_name.ilike(f"%{camp_name}%"))
     if status:
-        q = q.filter(Equipment.status == status)
-    rows = q.offset(offset).limit(limit).all()
-    return [
-        {
-            "equipment_id": r.equipment_id,
-            "equipment_name": r.equipment_name,
-            "camp_name": r.camp_name,
-            "region": r.region,
-            "status": r.status,
-            "next_maintenance_date": r.next_maintenance_date,
-            "start_date": r.start_date,
-            "end_date": r.end_date,
-        }
-        for r in rows
-    ]
+        stmt = stmt.where(Equipment.status == status)
+    return (await db.execute(stmt.offset(offset).limit(limit))).mappings().all()
 
 
-@app.get("/workshops", response_model=List[dict])
-def list_workshops_api(limit: int = 200, offset: int = 0, db: Session = Depends(get_db)):
-    rows = db.query(Workshop).offset(offset).limit(limit).all()
-    return [
-        {
-            "workshop_id": r.workshop_id,
-            "camp_name": r.camp_name,
-            "location_lat": r.location_lat,
-            "location_lon": r.location_lon,
-        }
-        for r in rows
-    ]
+@app.get("/workshops", response_model=List[WorkshopOut])
+async def list_workshops_api(limit: int = 200, offset: int = 0, db: AsyncSession = Depends(get_async_db)):
+    stmt = select(*WORKSHOP_COLUMNS).offset(offset).limit(limit)
+    return (await db.execute(stmt)).mappings().all()
 
 
-@app.get("/workorders", response_model=List[dict])
-def list_workorders_api(limit: int = 200, offset: int = 0, db: Session = Depends(get_db)):
-    rows = db.query(Workorder).offset(offset).limit(limit).all()
-    return [
-        {
-            "workorder_number": r.workorder_number,
-            "equipment_id": r.equipment_id,
-            "workorder_description": r.workorder_description,
-            "workshop_id": r.workshop_id,
-            "maintenance_start_date": r.maintenance_start_date,
-            "maintenance_end_date": r.maintenance_end_date,
-        }
-        for r in rows
-    ]
+@app.get("/workorders", response_model=List[WorkorderOut])
+async def list_workorders_api(limit: int = 200, offset: int = 0, db: AsyncSession = Depends(get_async_db)):
+    stmt = select(*WORKORDER_COLUMNS).offset(offset).limit(limit)
+    return (await db.execute(stmt)).mappings().all()
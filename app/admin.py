@@ -1,27 +1,10 @@
 from sqladmin import Admin, ModelView
-from sqladmin.authentication import AuthenticationBackend
-from fastapi import Request
 
+from app.auth import SimpleAuth
 from app.database import engine
 from app import models, config
 
 
-class SimpleAuth(AuthenticationBackend):
-    async def login(self, request: Request) -> bool:
-        form = await request.form()
-        if form.get("username") == "admin" and form.get("password") == "secret":
-            request.session.update({"user": "admin"})
-            return True
-        return False
-
-    async def logout(self, request: Request) -> bool:
-        request.session.clear()
-        return True
-
-    async def authenticate(self, request: Request) -> bool:
-        return bool(request.session.get("user"))
-
-
 # --- Admin Views ---
 class EquipmentAdmin(ModelView, model=models.Equipment):
     name_plural = "Equipments"
@@ -37,6 +20,9 @@ class EquipmentAdmin(ModelView, model=models.Equipment):
     ]
     column_searchable_list = column_list   # all columns searchable
     column_sortable_list = column_list     # all columns sortable
+    # derived from the names when the row is saved (models._derive_*_name_key)
+    column_details_exclude_list = [models.Equipment.equipment_name_key, models.Equipment.camp_name_key]
+    form_excluded_columns = [models.Equipment.equipment_name_key, models.Equipment.camp_name_key]
 
 
 class WorkshopAdmin(ModelView, model=models.Workshop):
@@ -48,6 +34,8 @@ class WorkshopAdmin(ModelView, model=models.Workshop):
     ]
     column_searchable_list = column_list
     column_sortable_list = column_list
+    column_details_exclude_list = [models.Workshop.camp_name_key]
+    form_excluded_columns = [models.Workshop.camp_name_key]
 
 
 class WorkorderAdmin(ModelView, model=models.Workorder):
@@ -0,0 +1,18 @@
+from sqladmin.authentication import AuthenticationBackend
+from fastapi import Request
+
+
+class SimpleAuth(AuthenticationBackend):
+    async def login(self, request: Request) -> bool:
+        form = await request.form()
+        if form.get("username") == "admin" and form.get("password") == "secret":
+            request.session.update({"user": "admin"})
+            return True
+        return False
+
+    async def logout(self, request: Request) -> bool:
+        request.session.clear()
+        return True
+
+    async def authenticate(self, request: Request) -> bool:
+        return bool(request.session.get("user"))
@@ -0,0 +1,104 @@
+# app/cache.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+
+
+class TTLCache:
+    """In-process cache: entries expire after `ttl` seconds, the oldest go past `maxsize`.
+
+    `generation` goes up on every clear(). A reader captures it before querying and passes it
+    to set(), which then drops a value computed from rows a commit has since changed.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()   # sync endpoints run on the threadpool
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return   # cleared while the value was being built
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+
+# /demand/check results. Cleared on every committed equipment/workshop write in this
+# process (see below); other workers keep serving their copy for at most DEMAND_CACHE_TTL seconds.
+demand = TTLCache(ttl=settings.DEMAND_CACHE_TTL)
+
+# Workshop rows/arrays behind /demand/check (routers.demand.workshop_arrays); one entry.
+# Cleared with `demand` on committed workshop writes.
+workshops = TTLCache(ttl=settings.WORKSHOP_CACHE_TTL, maxsize=1)
+
+
+# -------------------------
+# Invalidation
+# -------------------------
+# Caches derived from each table. A session that writes one of these tables clears them when
+# it commits, whatever did the write: the routers, the upload jobs or sqladmin.
+DEPENDENT_CACHES: dict[str, tuple[TTLCache, ...]] = {
+    models.Equipment.__tablename__: (demand,),
+    models.Workshop.__tablename__: (workshops, demand),
+}
+
+
+def _mark_stale(session: Session, table_name: str | None) -> None:
+    caches = DEPENDENT_CACHES.get(table_name)
+    if caches:
+        session.info.setdefault("stale_caches", set()).update(caches)
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed_writes(session, flush_context) -> None:
+    # unit-of-work writes: ORM objects added, changed or deleted
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        _mark_stale(session, getattr(obj, "__tablename__", None))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _statement_writes(orm_execute_state) -> None:
+    # insert()/update()/delete() statements, including the bulk upserts
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_stale(orm_execute_state.session, orm_execute_state.statement.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_stale(session) -> None:
+    for stale in session.info.pop("stale_caches", ()):
+        stale.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session) -> None:
+    session.info.pop("stale_caches", None)
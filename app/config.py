@@ -4,6 +4,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./fleet.db"
     SECRET_KEY: str = "super-secret"
+    DEMAND_CACHE_TTL: int = 60   # seconds
+    WORKSHOP_CACHE_TTL: int = 30   # seconds
 
     # optional: read from .env and allow FLEET_* env vars
     model_config = SettingsConfigDict(
@@ -0,0 +1,54 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class OpenCORSMiddleware:
+    """CORS for an API open to every origin (allow_origins/methods/headers = "*").
+
+    Same policy as CORSMiddleware(allow_origins=["*"], ...) without credentials, but the
+    header block is built once here instead of per request.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int = 86400) -> None:
+        self.app = app
+        self.simple_headers = [(b"access-control-allow-origin", b"*")]
+        # Access-Control-Allow-Headers is added per request: a literal "*" does not cover
+        # Authorization, so the requested headers are echoed back (as CORSMiddleware does).
+        self.preflight_headers = [
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-allow-methods", b"*"),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"content-length", b"0"),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        has_origin = preflight = False
+        requested_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                has_origin = True
+            elif name == b"access-control-request-method":
+                preflight = True
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+        if not has_origin:
+            await self.app(scope, receive, send)
+            return
+
+        if preflight and scope["method"] == "OPTIONS":
+            headers = self.preflight_headers
+            if requested_headers is not None:
+                headers = [*headers, (b"access-control-allow-headers", requested_headers)]
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *self.simple_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
@@ -2,10 +2,14 @@
 from __future__ import annotations
 
 from typing import Iterable, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, raiseload
 
 from . import models
 
+# for reads that only serialise columns: touching a relationship raises instead of lazy-loading
+NO_RELATIONSHIPS = (raiseload("*"),)
+
 
 # -------------------------
 # Generic helpers
@@ -16,14 +20,41 @@ def _apply_updates(obj, data: dict[str, object], allowed: Iterable[str]) -> None
             setattr(obj, k, data[k])
 
 
+def existing_keys(db: Session, column, keys: Iterable, chunk_size: int = 10_000) -> set:
+    """Return the subset of `keys` already present in `column` (one IN query per chunk)."""
+    keys = list(keys)
+    found = set()
+    for i in range(0, len(keys), chunk_size):
+        stmt = select(column).where(column.in_(keys[i:i + chunk_size]))
+        found.update(db.execute(stmt).scalars())
+    return found
+
+
+def bulk_upsert(db: Session, model, records: list[dict]) -> tuple[int, int]:
+    """Insert or update `records` (dicts keyed by column, PK included); returns (inserted, updated)."""
+    pk = model.__mapper__.primary_key[0]
+    existing = existing_keys(db, pk, (r[pk.key] for r in records))
+    to_insert = [r for r in records if r[pk.key] not in existing]
+    to_update = [r for r in records if r[pk.key] in existing]
+    # ORM bulk INSERT / bulk UPDATE by primary key (executemany). Unlike the legacy
+    # bulk_*_mappings they run through Session.execute, so cache invalidation sees them.
+    if to_insert:
+        db.execute(insert(model), to_insert)
+    if to_update:
+        db.execute(update(model), to_update)
+    db.commit()
+    return len(to_insert), len(to_update)
+
+
 # -------------------------
 # Workshops
 # -------------------------
-def get_workshop(db: Session, workshop_id: int) -> Optional[models.Workshop]:
-    return db.query(models.Workshop).get(workshop_id)
+def get_workshop(db: Session, workshop_id: int, options: Iterable = ()) -> Optional[models.Workshop]:
+    return db.get(models.Workshop, workshop_id, options=options)
 
 def list_workshops(db: Session, *, skip: int = 0, limit: int = 200):
-    return db.query(models.Workshop).offset(skip).limit(limit).all()
+    stmt = select(models.Workshop).offset(skip).limit(limit)
+    return db.execute(stmt).scalars().all()
 
 def create_workshop(
     db: Session,
@@ -66,8 +97,8 @@ def delete_workshop(db: Session, workshop_id: int) -> None:
 # -------------------------
 # Workorders
 # -------------------------
-def get_workorder(db: Session, workorder_number: int) -> Optional[models.Workorder]:
-    return db.query(models.Workorder).get(workorder_number)
+def get_workorder(db: Session, workorder_number: int, options: Iterable = ()) -> Optional[models.Workorder]:
+    return db.get(models.Workorder, workorder_number, options=options)
 
 def list_workorders(
     db: Session,
@@ -77,12 +108,12 @@ def list_workorders(
     equipment_id: int | None = None,
     workshop_id: int | None = None,
 ):
-    q = db.query(models.Workorder)
+    stmt = select(models.Workorder)
     if equipment_id is not None:
-        q = q.filter(models.Workorder.equipment_id == equipment_id)
+        stmt = stmt.where(models.Workorder.equipment_id == equipment_id)
     if workshop_id is not None:
-        q = q.filter(models.Workorder.workshop_id == workshop_id)
-    return q.offset(skip).limit(limit).all()
+        stmt = stmt.where(models.Workorder.workshop_id == workshop_id)
+    return db.execute(stmt.offset(skip).limit(limit)).scalars().all()
 
 def create_workorder(
     db: Session,
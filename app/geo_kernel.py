@@ -0,0 +1,64 @@
+# app/geo_kernel.py
+"""Great-circle distance kernels for check_demand.
+
+Haversine from one point to many, split in two so callers can gate on the cheap
+"a" term (monotonic in distance) before paying for sqrt/atan2. Missing
+coordinates come out as NaN.
+
+When numba is installed, large batches run through a compiled, multi-threaded
+loop; otherwise (and for the small batches the bounding-box prefilter usually
+leaves) the NumPy version is used.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional: NumPy handles everything without it
+    njit = None
+
+R_KM = 6371.0
+
+# below this many points thread start-up costs more than the trig it would split
+PARALLEL_MIN = 10_000
+
+
+def _haversine_a_numpy(lat1, lon1, lats, lons):
+    lat1r, lon1r = math.radians(lat1), math.radians(lon1)   # home terms: once, not per row
+    cos_lat1 = math.cos(lat1r)
+    lat2r, lon2r = np.radians(lats), np.radians(lons)
+    return np.sin((lat2r - lat1r)/2)**2 + cos_lat1*np.cos(lat2r)*np.sin((lon2r - lon1r)/2)**2
+
+
+if njit is not None:
+    # no fastmath: it lets LLVM assume no NaNs, and NaN is how missing coordinates drop out
+    @njit(cache=True, parallel=True)
+    def _haversine_a_parallel(lat1, lon1, lats, lons):
+        lat1r, lon1r = math.radians(lat1), math.radians(lon1)
+        cos_lat1 = math.cos(lat1r)
+        out = np.empty(lats.size)
+        for i in prange(lats.size):
+            lat2r, lon2r = math.radians(lats[i]), math.radians(lons[i])
+            s_lat = math.sin((lat2r - lat1r) / 2)
+            s_lon = math.sin((lon2r - lon1r) / 2)
+            out[i] = s_lat * s_lat + cos_lat1 * math.cos(lat2r) * s_lon * s_lon
+        return out
+
+
+def haversine_a(lat1, lon1, lats, lons):
+    """Haversine "a" term from (lat1, lon1) to each point of the float64 arrays lats/lons."""
+    if njit is not None and lats.size >= PARALLEL_MIN:
+        return _haversine_a_parallel(
+            float(lat1), float(lon1),
+            np.ascontiguousarray(lats, dtype=np.float64),
+            np.ascontiguousarray(lons, dtype=np.float64),
+        )
+    return _haversine_a_numpy(lat1, lon1, lats, lons)
+
+
+def arc_km(a):
+    # atan2 form stays accurate near antipodes, where asin(sqrt(a)) loses precision
+    return 2 * R_KM * np.arctan2(np.sqrt(a), np.sqrt(np.maximum(1 - a, 0)))   # a may round past 1
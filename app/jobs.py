@@ -0,0 +1,64 @@
+# app/jobs.py
+from __future__ import annotations
+
+import os
+import shutil
+from tempfile import NamedTemporaryFile
+from typing import Callable, Iterable
+from uuid import uuid4
+
+import pandas as pd
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from . import crud, database, utils
+from .cache import TTLCache
+
+CHUNK_SIZE = 1000   # rows per transaction
+
+# job_id -> status dict, updated in place by the worker. In-process: ask the worker that
+# accepted the upload (the status of finished jobs is kept for a day).
+JOBS = TTLCache(ttl=24 * 3600)
+
+
+async def submit_upload(
+    background_tasks: BackgroundTasks,
+    file: UploadFile,
+    columns: Iterable[str],
+    prepare: Callable[[pd.DataFrame], tuple[list[dict], list[str]]],
+    model,
+) -> str:
+    """Spool the upload to disk and import it after the response has been sent."""
+    suffix = utils.upload_suffix(file.filename)   # reject unsupported types up front
+    with NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        await run_in_threadpool(shutil.copyfileobj, file.file, tmp, 64 * 1024)
+
+    job_id = uuid4().hex
+    JOBS.set(job_id, {"status": "queued", "rows": None, "processed": 0,
+                      "inserted": 0, "updated": 0, "errors": [], "detail": None})
+    background_tasks.add_task(run_upload, job_id, tmp.name, file.filename, columns, prepare, model)
+    return job_id
+
+
+def run_upload(job_id, path, filename, columns, prepare, model) -> None:
+    job = JOBS.get(job_id)
+    job["status"] = "running"
+    db = database.SessionLocal()
+    try:
+        records, errors = prepare(utils.read_dataframe(path, filename, columns))
+        job.update(rows=len(records), errors=errors)
+        # one commit per chunk: short transactions, and a failure keeps the chunks already stored
+        for i in range(0, len(records), CHUNK_SIZE):
+            inserted, updated = crud.bulk_upsert(db, model, records[i:i + CHUNK_SIZE])
+            job["inserted"] += inserted
+            job["updated"] += updated
+            job["processed"] = min(i + CHUNK_SIZE, len(records))
+        job["status"] = "done"
+    except HTTPException as ex:
+        job.update(status="failed", detail=ex.detail)
+    except Exception as ex:
+        db.rollback()
+        job.update(status="failed", detail=str(ex))
+    finally:
+        db.close()
+        os.unlink(path)
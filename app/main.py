@@ -1,22 +1,78 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, inspect, select, update
+from sqlalchemy.schema import CreateIndex
 from starlette.middleware.sessions import SessionMiddleware
 from app.routers import demand
 from .database import Base, engine
-from app.routers import equipment, workshops, workorders
-from app import admin, config
+from . import models
+from app.routers import equipment, workshops, workorders, uploads
+from app import admin, cache, config  # noqa: F401  (cache: registers its invalidation hooks)
+from app.cors import OpenCORSMiddleware
 
-Base.metadata.create_all(bind=engine)
+SCHEMA_LOCK_ID = 0x666C656574  # "fleet"; arbitrary pg_advisory_xact_lock key
 
-app = FastAPI(title="Fleet Management API")
+# superseded by the *_name_key columns; dropped from databases created before them
+OLD_INDEXES = ("ix_equipment_camp_name_lower", "ix_workshop_camp_name_lower", "ix_equipment_camp_key")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+# (table, key column, the name it is derived from)
+NAME_KEYS = (
+    (models.Equipment.__table__, "camp_name_key", "camp_name"),
+    (models.Equipment.__table__, "equipment_name_key", "equipment_name"),
+    (models.Workshop.__table__, "camp_name_key", "camp_name"),
 )
 
+
+def backfill_name_keys(conn) -> None:
+    """Add the *_name_key columns to tables created before them and fill them for existing rows."""
+    for table, key, source in NAME_KEYS:
+        if key not in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {key} VARCHAR")
+        pk = table.primary_key.columns[0]
+        rows = conn.execute(select(pk, table.c[source]).where(table.c[key].is_(None))).all()
+        if rows:
+            # models.name_key in Python rather than SQL lower(trim()), which differ on non-ASCII
+            conn.execute(
+                update(table).where(pk == bindparam("pk")).values({key: bindparam("key")}),
+                [{"pk": row[0], "key": models.name_key(row[1])} for row in rows],
+            )
+
+
+def init_db() -> None:
+    # Runs once per worker; on Postgres the advisory lock makes workers take turns.
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})")
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")   # trigram indexes
+        Base.metadata.create_all(bind=conn)
+        backfill_name_keys(conn)
+        for name in OLD_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        # create_all() skips tables that already exist, so add indexes introduced later explicitly.
+        # IF NOT EXISTS rather than checkfirst: the database checks, no reflection round-trips.
+        # conn.execute() ignores Index.ddl_if, so the Postgres-only ones (the trigram GIN
+        # indexes, the only ones with postgresql_using) are skipped here by hand.
+        pg = conn.dialect.name == "postgresql"
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if pg or not index.dialect_options["postgresql"]["using"]:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # schema setup also checks out a first pooled connection
+    await run_in_threadpool(init_db)
+    yield
+
+
+app = FastAPI(title="Fleet Management API", lifespan=lifespan)
+
+# open CORS with a precomputed header block; browsers cache preflights for a day
+app.add_middleware(OpenCORSMiddleware, max_age=86400)
+
 app.add_middleware(SessionMiddleware, secret_key=config.settings.SECRET_KEY)
 
 # Routers
@@ -24,5 +80,6 @@ app.include_router(equipment.router)
 app.include_router(workshops.router)
 app.include_router(workorders.router)
 app.include_router(demand.router)
+app.include_router(uploads.router)
 # SQLAdmin
 admin.setup_admin(app)
@@ -1,12 +1,23 @@
-from sqlalchemy import Column, String, Date, Float, ForeignKey, Integer
+from sqlalchemy import Column, String, Date, Float, ForeignKey, Index, Integer, event
 from sqlalchemy.orm import relationship
 from .database import Base
 
+
+def name_key(name):
+    """Normalised name stored in the *_name_key columns; lookups compare against this.
+
+    Python's lower() rather than SQL lower(), which SQLite only applies to ASCII letters.
+    """
+    return name.strip().lower() if name is not None else None
+
+
 class Equipment(Base):
     __tablename__ = "equipment"
     equipment_id = Column(Integer, primary_key=True, autoincrement=False)  # stays INT if your file has numbers
     equipment_name = Column(String, nullable=False)
+    equipment_name_key = Column(String, nullable=True)   # name_key(equipment_name); set at flush, see below
     camp_name = Column(String, nullable=False)
+    camp_name_key = Column(String, nullable=True)   # name_key(camp_name); set at flush, see below
     region = Column(String, nullable=True)
     status = Column(String, nullable=False, default="ReadyToUse")
     next_maintenance_date = Column(Date, nullable=True)
@@ -19,6 +30,7 @@ class Workshop(Base):
     __tablename__ = "workshops"
     workshop_id = Column(String, primary_key=True)  # <— STRING PK
     camp_name = Column(String, nullable=False)
+    camp_name_key = Column(String, nullable=True, index=True)
     location_lat = Column(Float, nullable=True)
     location_lon = Column(Float, nullable=True)
 
@@ -35,3 +47,51 @@ class Workorder(Base):
 
     equipment = relationship("Equipment", back_populates="workorders")
     workshop = relationship("Workshop", back_populates="workorders")
+
+# The *_name_key columns are derived when the row is flushed, after every writer (routers,
+# crud, sqladmin forms) has set its attributes, so none of them can leave a key stale or set it.
+# Bulk insert()/update() statements skip mapper events; the upload paths set them themselves.
+@event.listens_for(Equipment, "before_insert")
+@event.listens_for(Equipment, "before_update")
+@event.listens_for(Workshop, "before_insert")
+@event.listens_for(Workshop, "before_update")
+def _derive_camp_name_key(mapper, connection, target):
+    target.camp_name_key = name_key(target.camp_name)
+
+@event.listens_for(Equipment, "before_insert")
+@event.listens_for(Equipment, "before_update")
+def _derive_equipment_name_key(mapper, connection, target):
+    target.equipment_name_key = name_key(target.equipment_name)
+
+# check_demand looks camps and equipment up by their keys, so both are btree seeks
+# (Workshop.camp_name_key carries its own index).
+Index(
+    "ix_equipment_name_keys",
+    Equipment.camp_name_key,
+    Equipment.equipment_name_key,
+    Equipment.status,
+)
+
+# lat_min/lat_max (+ lon) filters on /workshops: range scan on latitude, longitude checked in the index
+Index("ix_workshop_latlon", Workshop.location_lat, Workshop.location_lon)
+
+# The list endpoints filter these with ILIKE '%...%'. Only a pg_trgm GIN index can serve a
+# contains-match, so they exist on Postgres only (init_db creates the extension).
+Index(
+    "ix_equipment_equipment_name_trgm",
+    Equipment.equipment_name,
+    postgresql_using="gin",
+    postgresql_ops={"equipment_name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_equipment_camp_name_trgm",
+    Equipment.camp_name,
+    postgresql_using="gin",
+    postgresql_ops={"camp_name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_workshops_camp_name_trgm",
+    Workshop.camp_name,
+    postgresql_using="gin",
+    postgresql_ops={"camp_name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
@@ -1,23 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, case, func, not_, or_
 from sqlalchemy.orm import Session
-from typing import Optional, List, Dict
+from typing import NamedTuple, Optional, List, Dict
 import math
+import numpy as np
 from datetime import date
 
-from app import database, models
+from app import cache, database, models
+from app.geo_kernel import R_KM, arc_km, haversine_a
 
 router = APIRouter(prefix="/demand", tags=["Demand"])
 
-# Haversine (km)
-def haversine_km(lat1, lon1, lat2, lon2):
-    if None in (lat1, lon1, lat2, lon2):
-        return None
-    R = 6371.0
-    p1, p2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlmb = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dlmb/2)**2
-    return 2 * R * math.asin(math.sqrt(a))
+
+class WorkshopArrays(NamedTuple):
+    rows: list                  # (workshop_id, camp_name, camp_name_key, location_lat, location_lon)
+    keys: np.ndarray            # camp_name_key per row
+    lats: np.ndarray            # float64, missing -> NaN
+    lons: np.ndarray
+    first_by_key: dict          # camp_name_key -> index of its first workshop row
+
+
+def workshop_arrays(db: Session) -> WorkshopArrays:
+    """Every workshop as column arrays; built once per cache.workshops TTL, not per request."""
+    arrays = cache.workshops.get("all")
+    if arrays is None:
+        generation = cache.workshops.generation   # before the query: see TTLCache
+        W = models.Workshop
+        rows = db.query(W.workshop_id, W.camp_name, W.camp_name_key, W.location_lat, W.location_lon).all()
+        first_by_key = {}
+        for i, r in enumerate(rows):
+            first_by_key.setdefault(r.camp_name_key, i)
+        arrays = WorkshopArrays(
+            rows=rows,
+            keys=np.array([r.camp_name_key for r in rows], dtype=object),
+            lats=np.array([r.location_lat for r in rows], dtype=float),  # None -> NaN
+            lons=np.array([r.location_lon for r in rows], dtype=float),
+            first_by_key=first_by_key,
+        )
+        for a in (arrays.keys, arrays.lats, arrays.lons):
+            a.flags.writeable = False   # shared by concurrent requests
+        cache.workshops.set("all", arrays, generation)
+    return arrays
+
+
+def bounding_box(lat, lon, radius_km):
+    """Lat/lon ranges that contain every point within radius_km of (lat, lon).
+
+    Returns (lat_min, lat_max, lon_ranges); lon_ranges is None when the circle covers a pole
+    (every longitude qualifies) and has two ranges when it crosses the antimeridian.
+    """
+    ang = radius_km / R_KM                               # angular radius
+    dlat = math.degrees(ang)
+    lat_min, lat_max = lat - dlat, lat + dlat
+    if lat_min <= -90 or lat_max >= 90 or ang >= math.pi / 2:
+        return max(lat_min, -90.0), min(lat_max, 90.0), None
+    # widest longitude offset of the circle (reached north/south of the centre, not at it)
+    dlon = math.degrees(math.asin(math.sin(ang) / math.cos(math.radians(lat))))
+    lon_min, lon_max = lon - dlon, lon + dlon
+    if lon_min < -180:
+        return lat_min, lat_max, [(lon_min + 360, 180.0), (-180.0, lon_max)]
+    if lon_max > 180:
+        return lat_min, lat_max, [(lon_min, 180.0), (-180.0, lon_max - 360)]
+    return lat_min, lat_max, [(lon_min, lon_max)]
+
 
 @router.post("/check")
 def check_demand(
@@ -29,30 +74,37 @@ def check_demand(
     radius_km: float = 15.0,
     db: Session = Depends(database.get_db),
 ):
+    key = (camp_name, equipment_name, start_date, end_date, quantity, radius_km)
+    hit = cache.demand.get(key)
+    if hit is not None:
+        return hit
+    generation = cache.demand.generation   # before any query: see TTLCache
+
+    home_key = models.name_key(camp_name)
+    equipment_key = models.name_key(equipment_name)
+
     # 1) locate the home camp coordinates
-    home_ws = db.query(models.Workshop).filter(models.Workshop.camp_name.ilike(camp_name)).first()
-    if not home_ws:
+    ws_arrays = workshop_arrays(db)
+    home_i = ws_arrays.first_by_key.get(home_key)
+    if home_i is None:
         raise HTTPException(404, f"Camp '{camp_name}' not found in workshops table")
+    home_ws = ws_arrays.rows[home_i]
 
     # 2) compute availability at the home camp (ReadyToUse and not overlapping)
-    q_home = (
-        db.query(models.Equipment)
-          .filter(models.Equipment.camp_name.ilike(camp_name))
-          .filter(models.Equipment.equipment_name.ilike(equipment_name))
+    E = models.Equipment
+    # if both dates are present, overlap means e.start <= req.end and req.start <= e.end
+    is_available = and_(
+        E.status == "ReadyToUse",
+        or_(E.start_date.is_(None), E.end_date.is_(None),
+            not_(and_(E.start_date <= end_date, start_date <= E.end_date))),
+    )
+    available_home = (
+        db.query(func.count(E.equipment_id))
+          .filter(E.camp_name_key == home_key)
+          .filter(E.equipment_name_key == equipment_key)
+          .filter(is_available)
+          .scalar()
     )
-
-    def is_available(e: models.Equipment) -> bool:
-        if e.status != "ReadyToUse":
-            return False
-        # if dates present, ensure no overlap with the request window
-        if e.start_date and e.end_date:
-            # overlap if e.start <= req.end and req.start <= e.end
-            overlap = (e.start_date <= end_date) and (start_date <= e.end_date)
-            return not overlap
-        return True
-
-    home_elems = [e for e in q_home.all() if is_available(e)]
-    available_home = len(home_elems)
     meets = available_home >= quantity
 
     # 3) if home meets, no map needed
@@ -74,32 +126,53 @@ def check_demand(
     }
 
     if meets:
+        cache.demand.set(key, result, generation)
         return result
 
     # 4) build alternatives within radius
     #    For each workshop, compute distance & counts for the requested equipment
-    all_ws = db.query(models.Workshop).all()
-    alts = []
-    for ws in all_ws:
-        if ws.camp_name.lower() == camp_name.lower():
-            continue
-        dist = haversine_km(home_ws.location_lat, home_ws.location_lon, ws.location_lat, ws.location_lon)
-        if dist is None or dist > radius_km:
-            continue
-
-        eq = (db.query(models.Equipment)
-                .filter(models.Equipment.camp_name.ilike(ws.camp_name))
-                .filter(models.Equipment.equipment_name.ilike(equipment_name))
-                .all())
-
-        ready = 0
-        maint = 0
-        for e in eq:
-            if e.status == "UnderMaintenance":
-                maint += 1
-            elif e.status == "ReadyToUse" and is_available(e):
-                ready += 1
+    rows, lats, lons = ws_arrays.rows, ws_arrays.lats, ws_arrays.lons
+    home_lat, home_lon = home_ws.location_lat, home_ws.location_lon
+    if home_lat is None or home_lon is None:
+        idx, dists = np.empty(0, dtype=np.intp), np.empty(0)   # no centre, nothing is within the radius
+    else:
+        # bounding-box prefilter so only plausible workshops reach the haversine; NaN
+        # compares False, so workshops without coordinates drop out here
+        lat_min, lat_max, lon_ranges = bounding_box(home_lat, home_lon, radius_km)
+        box = (lats >= lat_min) & (lats <= lat_max)
+        if lon_ranges is not None:
+            box &= np.logical_or.reduce([(lons >= lo) & (lons <= hi) for lo, hi in lon_ranges])
+        cand = np.flatnonzero(box & (ws_arrays.keys != home_key))
+        a = haversine_a(home_lat, home_lon, lats[cand], lons[cand])
+        # dist <= radius  <=>  a <= sin²(radius / 2R)
+        a_max = math.sin(min(radius_km / (2 * R_KM), math.pi / 2)) ** 2
+        within = a <= a_max
+        idx, dists = cand[within], arc_km(a[within])
+
+    if idx.size == 0:
+        cache.demand.set(key, result, generation)   # alternatives stays []
+        return result
+
+    # ready / under-maintenance counts for the requested equipment, per candidate camp, in one query
+    candidate_keys = {rows[i].camp_name_key for i in idx}
+    counts = {
+        camp: (ready, maint)
+        for camp, ready, maint in (
+            db.query(
+                E.camp_name_key,
+                func.count(case((is_available, 1))),
+                func.count(case((E.status == "UnderMaintenance", 1))),
+            )
+            .filter(E.equipment_name_key == equipment_key)
+            .filter(E.camp_name_key.in_(candidate_keys))
+            .group_by(E.camp_name_key)
+        )
+    }
 
+    alts = []
+    for i, dist in zip(idx, dists.tolist()):
+        ws = rows[i]
+        ready, maint = counts.get(ws.camp_name_key, (0, 0))
         alts.append({
             "camp_name": ws.camp_name,
             "workshop_id": getattr(ws, "workshop_id", None),
@@ -111,4 +184,5 @@ def check_demand(
     # sort by distance, best first
     alts.sort(key=lambda x: (x["distance_km"], -x["counts"]["ready_to_use"]))
     result["alternatives"] = alts
+    cache.demand.set(key, result, generation)
     return result
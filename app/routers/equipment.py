@@ -1,19 +1,46 @@
 # app/routers/equipment.py
 from __future__ import annotations
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 import pandas as pd
-from .. import database, schemas, models, utils
+from .. import database, schemas, models, crud, jobs, utils
 from datetime import date
+
 router = APIRouter(prefix="/equipment", tags=["Equipment"])
 ALLOWED_STATUS = {"ReadyToUse", "UnderMaintenance", "Allocated"}
+# every column the upload reads; anything else in the file is skipped while parsing
+UPLOAD_COLUMNS = {
+    "equipment_id",
+    "equipment_name",
+    "camp_name",
+    "region",
+    "status",
+    "next_maintenance_date",
+    "start_date",
+    "end_date",
+}
+# columns served by the list and export endpoints
+COLUMNS = (
+    models.Equipment.equipment_id,
+    models.Equipment.equipment_name,
+    models.Equipment.camp_name,
+    models.Equipment.region,
+    models.Equipment.status,
+    models.Equipment.next_maintenance_date,
+    models.Equipment.start_date,
+    models.Equipment.end_date,
+)
+COLUMN_KEYS = tuple(c.key for c in COLUMNS)
+
+
 # -------------------------
 # CRUD
 # -------------------------
 # at top:
 from datetime import date
 
+
 @router.get("/", response_model=List[schemas.EquipmentOut])
 def list_equipment(
     equipment_id: Optional[int] = None,
@@ -30,7 +57,8 @@ def list_equipment(
     next_maintenance_to: Optional[date] = None,
     db: Session = Depends(database.get_db),
 ):
-    q = db.query(models.Equipment)
+    # plain column tuples: no ORM instances to build and read back attribute by attribute
+    q = db.query(*COLUMNS)
 
     if equipment_id is not None:
         q = q.filter(models.Equipment.equipment_id == equipment_id)
@@ -58,13 +86,21 @@ def list_equipment(
     if next_maintenance_to:
         q = q.filter(models.Equipment.next_maintenance_date <= next_maintenance_to)
 
-    return q.order_by(models.Equipment.equipment_id).all()
+    return [dict(zip(COLUMN_KEYS, row)) for row in q.order_by(models.Equipment.equipment_id)]
 
 
+# -------------------------
+# Export (.xlsx / .csv)
+# -------------------------
+# registered ahead of the "/{id}" route, which would otherwise capture "export.xlsx"
+@router.get("/export.xlsx")
+def export_equipment(format: Literal["xlsx", "csv"] = "xlsx", db: Session = Depends(database.get_db)):
+    return utils.export_response(db, COLUMNS, "equipment", format)
+
 
 @router.get("/{equipment_id}", response_model=schemas.EquipmentOut)
 def get_equipment(equipment_id: int, db: Session = Depends(database.get_db)):
-    obj = db.query(models.Equipment).get(equipment_id)
+    obj = db.get(models.Equipment, equipment_id, options=crud.NO_RELATIONSHIPS)
     if not obj:
         raise HTTPException(404, "Equipment not found")
     return obj
@@ -97,7 +133,7 @@ def update_equipment(
     data: dict,  # partial update; keys like EquipmentBase
     db: Session = Depends(database.get_db),
 ):
-    obj = db.query(models.Equipment).get(equipment_id)
+    obj = db.get(models.Equipment, equipment_id)
     if not obj:
         raise HTTPException(404, "Equipment not found")
 
@@ -124,7 +160,7 @@ def update_equipment(
 
 @router.delete("/{equipment_id}")
 def delete_equipment(equipment_id: int, db: Session = Depends(database.get_db)):
-    obj = db.query(models.Equipment).get(equipment_id)
+    obj = db.get(models.Equipment, equipment_id)
     if not obj:
         raise HTTPException(404, "Equipment not found")
     db.delete(obj)
@@ -135,8 +171,41 @@ def delete_equipment(equipment_id: int, db: Session = Depends(database.get_db)):
 # -------------------------
 # Upload (.xlsx / .csv)
 # -------------------------
+def _prepare_upload(df: pd.DataFrame) -> tuple[list[dict], list[str]]:
+    utils.ensure_columns(df, {"equipment_id", "equipment_name", "camp_name"})
+
+    ids, bad_id = utils.num_column(df, "equipment_id", int)
+    clean = pd.DataFrame(
+        {
+            "equipment_id": ids,
+            "equipment_name": utils.str_column(df, "equipment_name"),
+            "camp_name": utils.str_column(df, "camp_name"),
+            "region": utils.str_column(df, "region"),
+            "status": utils.str_column(df, "status").fillna("ReadyToUse"),
+            "next_maintenance_date": utils.date_column(df, "next_maintenance_date"),
+            "start_date": utils.date_column(df, "start_date"),
+            "end_date": utils.date_column(df, "end_date"),
+        }
+    )
+    # bulk statements skip the models' flush hooks, so derive the keys here
+    clean["equipment_name_key"] = clean["equipment_name"].map(models.name_key)
+    clean["camp_name_key"] = clean["camp_name"].map(models.name_key)
+    bad, errors = utils.row_errors(
+        [
+            (bad_id | clean["equipment_id"].isna(), "equipment_id must be an integer"),
+            (clean["equipment_name"].isna() | clean["camp_name"].isna(),
+             "equipment_name and camp_name are mandatory"),
+            (~clean["status"].isin(ALLOWED_STATUS), f"invalid status (allowed: {', '.join(sorted(ALLOWED_STATUS))})"),
+        ]
+    )
+
+    # one record per equipment_id (last row wins); jobs.run_upload upserts them
+    records = clean[~bad].drop_duplicates("equipment_id", keep="last").to_dict(orient="records")
+    return records, errors
+
+
 @router.post("/upload")
-async def upload_equipment(file: UploadFile = File(...), db: Session = Depends(database.get_db)):
+async def upload_equipment(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Required columns (case-insensitive):
       - equipment_id  (int)
@@ -146,79 +215,8 @@ async def upload_equipment(file: UploadFile = File(...), db: Session = Depends(d
       - region, status [ReadyToUse|UnderMaintenance|Allocated],
       - next_maintenance_date, start_date, end_date
     """
-    import pandas as pd
-
-    df = await utils.read_dataframe_any(file)           # handles xlsx/csv + normalizes headers
-    utils.ensure_columns(df, {"equipment_id", "equipment_name", "camp_name"})
-
-    inserted, updated, errors = 0, 0, []
-    for i, row in df.iterrows():
-        try:
-            eid = int(row["equipment_id"])
-
-            # fetch existing (UPSERT)
-            obj = db.get(models.Equipment, eid)
-            creating = obj is None
-            if creating:
-                obj = models.Equipment(equipment_id=eid)
-
-            # validate/assign
-            name = str(row["equipment_name"]).strip()
-            camp = str(row["camp_name"]).strip()
-            if not name or not camp:
-                raise ValueError("equipment_name and camp_name are mandatory")
-
-            obj.equipment_name = name
-            obj.camp_name = camp
-            obj.region = (str(row["region"]).strip()
-                          if "region" in df.columns and pd.notna(row.get("region")) else None)
-
-            status = (str(row["status"]).strip()
-                      if "status" in df.columns and pd.notna(row.get("status")) else "ReadyToUse")
-            if status not in {"ReadyToUse", "UnderMaintenance", "Allocated"}:
-                raise ValueError(f"invalid status '{status}'")
-            obj.status = status
-
-            obj.next_maintenance_date = utils.parse_any_date(row.get("next_maintenance_date")) \
-                if "next_maintenance_date" in df.columns else None
-            obj.start_date = utils.parse_any_date(row.get("start_date")) \
-                if "start_date" in df.columns else None
-            obj.end_date = utils.parse_any_date(row.get("end_date")) \
-                if "end_date" in df.columns else None
-
-            if creating:
-                db.add(obj)
-                inserted += 1
-            else:
-                updated += 1
-
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-
-    db.commit()
-    return {"inserted": inserted, "updated": updated, "errors": errors}
-
-
-
-# -------------------------
-# Export (.xlsx)
-# -------------------------
-@router.get("/export.xlsx")
-def export_equipment(db: Session = Depends(database.get_db)):
-    rows = db.query(models.Equipment).all()
-    df = pd.DataFrame(
-        [
-            dict(
-                equipment_id=r.equipment_id,
-                equipment_name=r.equipment_name,
-                camp_name=r.camp_name,
-                region=r.region,
-                status=r.status,
-                next_maintenance_date=r.next_maintenance_date,
-                start_date=r.start_date,
-                end_date=r.end_date,
-            )
-            for r in rows
-        ]
+    # the import runs after the response; poll GET /upload/status/{job_id} for the outcome
+    job_id = await jobs.submit_upload(
+        background_tasks, file, UPLOAD_COLUMNS, _prepare_upload, models.Equipment
     )
-    return utils.excel_response(df, "equipment.xlsx")
+    return {"job_id": job_id}
@@ -0,0 +1,14 @@
+# app/routers/uploads.py
+from fastapi import APIRouter, HTTPException
+
+from .. import jobs
+
+router = APIRouter(prefix="/upload", tags=["Uploads"])
+
+
+@router.get("/status/{job_id}")
+def upload_status(job_id: str):
+    job = jobs.JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Upload job not found")
+    return {"job_id": job_id, **job}
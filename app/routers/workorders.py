@@ -1,12 +1,32 @@
 # app/routers/workorder.py
 from __future__ import annotations
 from datetime import date
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
-from .. import database, schemas, models, crud, utils
+from .. import database, schemas, models, crud, jobs, utils
 import pandas as pd
+
 router = APIRouter(prefix="/workorders", tags=["Workorders"])
+# every column the upload reads; anything else in the file is skipped while parsing
+UPLOAD_COLUMNS = {
+    "workorder_number",
+    "equipment_id",
+    "workorder_description",
+    "workshop_id",
+    "maintenance_start_date",
+    "maintenance_end_date",
+}
+# columns served by the list and export endpoints
+COLUMNS = (
+    models.Workorder.workorder_number,
+    models.Workorder.equipment_id,
+    models.Workorder.workorder_description,
+    models.Workorder.workshop_id,
+    models.Workorder.maintenance_start_date,
+    models.Workorder.maintenance_end_date,
+)
+COLUMN_KEYS = tuple(c.key for c in COLUMNS)
 
 
 # -------------------------
@@ -24,7 +44,8 @@ def list_workorders(
     maintenance_end_to: Optional[date] = None,
     db: Session = Depends(database.get_db),
 ):
-    q = db.query(models.Workorder)
+    # plain column tuples: no ORM instances to build and read back attribute by attribute
+    q = db.query(*COLUMNS)
 
     if workorder_number:
         q = q.filter(models.Workorder.workorder_number == workorder_number)
@@ -44,15 +65,26 @@ def list_workorders(
     if maintenance_end_to:
         q = q.filter(models.Workorder.maintenance_end_date <= maintenance_end_to)
 
-    return q.order_by(models.Workorder.workorder_number).all()
+    return [dict(zip(COLUMN_KEYS, row)) for row in q.order_by(models.Workorder.workorder_number)]
+
+
+# -------------------------
+# Export (.xlsx / .csv)
+# -------------------------
+# registered ahead of the "/{id}" route, which would otherwise capture "export.xlsx"
+@router.get("/export.xlsx")
+def export_workorders(format: Literal["xlsx", "csv"] = "xlsx", db: Session = Depends(database.get_db)):
+    return utils.export_response(db, COLUMNS, "workorders", format)
+
 
 @router.get("/{workorder_number}", response_model=schemas.WorkorderOut)
 def get_workorder(workorder_number: int, db: Session = Depends(database.get_db)):
-    wo = crud.get_workorder(db, workorder_number)
+    wo = crud.get_workorder(db, workorder_number, crud.NO_RELATIONSHIPS)
     if not wo:
         raise HTTPException(404, "Workorder not found")
     return wo
 
+
 @router.post("/", response_model=schemas.WorkorderOut)
 def create_workorder(payload: schemas.WorkorderBase, db: Session = Depends(database.get_db)):
     wo = crud.create_workorder(
@@ -65,6 +97,7 @@ def create_workorder(payload: schemas.WorkorderBase, db: Session = Depends(datab
     )
     return wo
 
+
 @router.patch("/{workorder_number}", response_model=schemas.WorkorderOut)
 def update_workorder(
     workorder_number: int,
@@ -76,6 +109,7 @@ def update_workorder(
     except ValueError as e:
         raise HTTPException(404, str(e))
 
+
 @router.delete("/{workorder_number}")
 def delete_workorder(workorder_number: int, db: Session = Depends(database.get_db)):
     try:
@@ -88,58 +122,34 @@ def delete_workorder(workorder_number: int, db: Session = Depends(database.get_d
 # -------------------------
 # Upload (.xlsx / .csv)
 # -------------------------
-@router.post("/upload")
-async def upload_workorders(file: UploadFile = File(...), db: Session = Depends(database.get_db)):
-    df = await utils.read_dataframe_any(file)
+def _prepare_upload(df: pd.DataFrame) -> tuple[list[dict], list[str]]:
     utils.ensure_columns(df, {"workorder_number", "equipment_id"})
 
-    inserted, updated, errors = 0, 0, []
-    for i, row in df.iterrows():
-        try:
-            won = str(row["workorder_number"]).strip()         # STRING PK
-            obj = db.get(models.Workorder, won)
-            creating = obj is None
-            if creating:
-                obj = models.Workorder(workorder_number=won)
-
-            obj.equipment_id = int(row["equipment_id"])        # your equipment IDs are numeric
-            obj.workorder_description = (str(row["workorder_description"]).strip()
-                                         if "workorder_description" in df.columns and pd.notna(row.get("workorder_description")) else None)
-            obj.workshop_id = (str(row["workshop_id"]).strip()
-                               if "workshop_id" in df.columns and pd.notna(row.get("workshop_id")) else None)  # <— STRING
-            obj.maintenance_start_date = utils.parse_any_date(row.get("maintenance_start_date")) if "maintenance_start_date" in df.columns else None
-            obj.maintenance_end_date = utils.parse_any_date(row.get("maintenance_end_date")) if "maintenance_end_date" in df.columns else None
-
-            if creating:
-                db.add(obj); inserted += 1
-            else:
-                updated += 1
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-
-    db.commit()
-    return {"inserted": inserted, "updated": updated, "errors": errors}
-
-
-
-
-# -------------------------
-# Export (.xlsx)
-# -------------------------
-@router.get("/export.xlsx")
-def export_workorders(db: Session = Depends(database.get_db)):
-    rows = db.query(models.Workorder).all()
-    df = pd.DataFrame(
+    eq_ids, bad_eq = utils.num_column(df, "equipment_id", int)   # your equipment IDs are numeric
+    clean = pd.DataFrame(
+        {
+            "workorder_number": utils.str_column(df, "workorder_number"),   # STRING PK
+            "equipment_id": eq_ids,
+            "workorder_description": utils.str_column(df, "workorder_description"),
+            "workshop_id": utils.str_column(df, "workshop_id"),             # <— STRING
+            "maintenance_start_date": utils.date_column(df, "maintenance_start_date"),
+            "maintenance_end_date": utils.date_column(df, "maintenance_end_date"),
+        }
+    )
+    bad, errors = utils.row_errors(
         [
-            dict(
-                workorder_number=r.workorder_number,
-                equipment_id=r.equipment_id,
-                workorder_description=r.workorder_description,
-                workshop_id=r.workshop_id,
-                maintenance_start_date=r.maintenance_start_date,
-                maintenance_end_date=r.maintenance_end_date,
-            )
-            for r in rows
+            (clean["workorder_number"].isna(), "workorder_number is mandatory"),
+            (bad_eq | clean["equipment_id"].isna(), "equipment_id must be an integer"),
         ]
     )
-    return utils.excel_response(df, "workorders.xlsx")
+
+    # one record per workorder_number (last row wins); jobs.run_upload upserts them
+    records = clean[~bad].drop_duplicates("workorder_number", keep="last").to_dict(orient="records")
+    return records, errors
+
+
+@router.post("/upload")
+async def upload_workorders(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    # the import runs after the response; poll GET /upload/status/{job_id} for the outcome
+    job_id = await jobs.submit_upload(background_tasks, file, UPLOAD_COLUMNS, _prepare_upload, models.Workorder)
+    return {"job_id": job_id}
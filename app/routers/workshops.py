@@ -1,12 +1,23 @@
 # app/routers/workshop.py
 from __future__ import annotations
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
-from .. import database, schemas, models, crud, utils
+from .. import database, schemas, models, crud, jobs, utils
 import pandas as pd
+
 router = APIRouter(prefix="/workshops", tags=["Workshops"])
-from typing import Optional
+# every column the upload reads; anything else in the file is skipped while parsing
+UPLOAD_COLUMNS = {"workshop_id", "camp_name", "location_lat", "location_lon"}
+# columns served by the list and export endpoints
+COLUMNS = (
+    models.Workshop.workshop_id,
+    models.Workshop.camp_name,
+    models.Workshop.location_lat,
+    models.Workshop.location_lon,
+)
+COLUMN_KEYS = tuple(c.key for c in COLUMNS)
+
 
 # -------------------------
 # CRUD
@@ -23,7 +34,8 @@ def list_workshops(
     lon_max: Optional[float] = None,
     db: Session = Depends(database.get_db),
 ):
-    q = db.query(models.Workshop)
+    # plain column tuples: no ORM instances to build and read back attribute by attribute
+    q = db.query(*COLUMNS)
 
     if workshop_id:
         q = q.filter(models.Workshop.workshop_id == workshop_id)
@@ -46,15 +58,26 @@ def list_workshops(
     if lon_max is not None:
         q = q.filter(models.Workshop.location_lon <= lon_max)
 
-    return q.order_by(models.Workshop.workshop_id).all()
+    return [dict(zip(COLUMN_KEYS, row)) for row in q.order_by(models.Workshop.workshop_id)]
+
+
+# -------------------------
+# Export (.xlsx / .csv)
+# -------------------------
+# registered ahead of the "/{id}" route, which would otherwise capture "export.xlsx"
+@router.get("/export.xlsx")
+def export_workshops(format: Literal["xlsx", "csv"] = "xlsx", db: Session = Depends(database.get_db)):
+    return utils.export_response(db, COLUMNS, "workshops", format)
+
 
 @router.get("/{workshop_id}", response_model=schemas.WorkshopOut)
 def get_workshop(workshop_id: int, db: Session = Depends(database.get_db)):
-    ws = crud.get_workshop(db, workshop_id)
+    ws = crud.get_workshop(db, workshop_id, crud.NO_RELATIONSHIPS)
     if not ws:
         raise HTTPException(404, "Workshop not found")
     return ws
 
+
 @router.post("/", response_model=schemas.WorkshopOut)
 def create_workshop(payload: schemas.WorkshopBase, db: Session = Depends(database.get_db)):
     return crud.create_workshop(
@@ -64,6 +87,7 @@ def create_workshop(payload: schemas.WorkshopBase, db: Session = Depends(databas
         location_lon=payload.location_lon,
     )
 
+
 @router.patch("/{workshop_id}", response_model=schemas.WorkshopOut)
 def update_workshop(workshop_id: int, data: dict, db: Session = Depends(database.get_db)):
     try:
@@ -71,6 +95,7 @@ def update_workshop(workshop_id: int, data: dict, db: Session = Depends(database
     except ValueError as e:
         raise HTTPException(404, str(e))
 
+
 @router.delete("/{workshop_id}")
 def delete_workshop(workshop_id: int, db: Session = Depends(database.get_db)):
     try:
@@ -83,51 +108,37 @@ def delete_workshop(workshop_id: int, db: Session = Depends(database.get_db)):
 # -------------------------
 # Upload (.xlsx / .csv)
 # -------------------------
-@router.post("/upload")
-async def upload_workshops(file: UploadFile = File(...), db: Session = Depends(database.get_db)):
-    df = await utils.read_dataframe_any(file)
+def _prepare_upload(df: pd.DataFrame) -> tuple[list[dict], list[str]]:
     utils.ensure_columns(df, {"workshop_id", "camp_name"})
 
-    inserted, updated, errors = 0, 0, []
-    for i, row in df.iterrows():
-        try:
-            wid = str(row["workshop_id"]).strip()              # <— STRING
-            obj = db.get(models.Workshop, wid)
-            creating = obj is None
-            if creating:
-                obj = models.Workshop(workshop_id=wid)
-
-            obj.camp_name = str(row["camp_name"]).strip()
-            obj.location_lat = float(row["location_lat"]) if "location_lat" in df.columns and pd.notna(row.get("location_lat")) else None
-            obj.location_lon = float(row["location_lon"]) if "location_lon" in df.columns and pd.notna(row.get("location_lon")) else None
-
-            if creating:
-                db.add(obj); inserted += 1
-            else:
-                updated += 1
-        except Exception as ex:
-            errors.append(f"Row {i+2}: {ex}")
-
-    db.commit()
-    return {"inserted": inserted, "updated": updated, "errors": errors}
+    lat, bad_lat = utils.num_column(df, "location_lat")
+    lon, bad_lon = utils.num_column(df, "location_lon")
+    clean = pd.DataFrame(
+        {
+            "workshop_id": utils.str_column(df, "workshop_id"),   # <— STRING
+            "camp_name": utils.str_column(df, "camp_name"),
+            "location_lat": lat,
+            "location_lon": lon,
+        }
+    )
+    # bulk statements skip the models' flush hook, so derive the key here
+    clean["camp_name_key"] = clean["camp_name"].map(models.name_key)
+    bad, errors = utils.row_errors(
+        [
+            (clean["workshop_id"].isna() | clean["camp_name"].isna(), "workshop_id and camp_name are mandatory"),
+            (bad_lat | bad_lon, "location_lat/location_lon must be numeric"),
+        ]
+    )
 
+    # one record per workshop_id (last row wins); jobs.run_upload upserts them
+    records = clean[~bad].drop_duplicates("workshop_id", keep="last").to_dict(orient="records")
+    return records, errors
 
 
-# -------------------------
-# Export (.xlsx)
-# -------------------------
-@router.get("/export.xlsx")
-def export_workshops(db: Session = Depends(database.get_db)):
-    rows = db.query(models.Workshop).all()
-    df = pd.DataFrame(
-        [
-            dict(
-                workshop_id=r.workshop_id,
-                camp_name=r.camp_name,
-                location_lat=r.location_lat,
-                location_lon=r.location_lon,
-            )
-            for r in rows
-        ]
+@router.post("/upload")
+async def upload_workshops(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    # the import runs after the response; poll GET /upload/status/{job_id} for the outcome
+    job_id = await jobs.submit_upload(
+        background_tasks, file, UPLOAD_COLUMNS, _prepare_upload, models.Workshop
     )
-    return utils.excel_response(df, "workshops.xlsx")
+    return {"job_id": job_id}
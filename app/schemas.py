@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import date
 
@@ -15,9 +15,8 @@ class EquipmentCreate(EquipmentBase):
     pass
 
 class EquipmentOut(EquipmentBase):
+    model_config = ConfigDict(from_attributes=True)
     equipment_id: int
-    class Config:
-        orm_mode = True
 
 class WorkshopBase(BaseModel):
     camp_name: str
@@ -25,6 +24,7 @@ class WorkshopBase(BaseModel):
     location_lon: Optional[float] = None
 
 class WorkshopOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     workshop_id: str
     camp_name: str
     location_lat: Optional[float] = None
@@ -38,6 +38,7 @@ class WorkorderBase(BaseModel):
     maintenance_end_date: Optional[date] = None
 
 class WorkorderOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     workorder_number: str
     equipment_id: int
     workshop_id: Optional[str] = None
@@ -1,39 +1,57 @@
 # app/utils.py
 from __future__ import annotations
 
-import datetime as dt
-from io import BytesIO
+import csv
+from importlib.util import find_spec
+from tempfile import SpooledTemporaryFile
 from typing import Iterable
 
 import pandas as pd
-from fastapi import UploadFile, HTTPException
+import xlsxwriter
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from starlette.responses import StreamingResponse
 
 
 # -------------------------
 # Date parsing
 # -------------------------
-def parse_any_date(value):
-    """Accept dd-mm-yyyy / yyyy-mm-dd / dd/mm/yyyy / yyyy/mm/dd / Excel serials."""
-    if value in (None, "", "nan"):
-        return None
-    if isinstance(value, dt.datetime):
-        return value.date()
-    if isinstance(value, dt.date):
-        return value
-
-    s = str(value).strip()
-    for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"):
-        try:
-            return dt.datetime.strptime(s, fmt).date()
-        except Exception:
-            pass
-    try:  # Excel serials
-        serial = float(s)
-        excel_epoch = dt.datetime(1899, 12, 30)
-        return (excel_epoch + dt.timedelta(days=serial)).date()
-    except Exception:
-        return None
+# ISO first: it is what most files (and str() of date cells) contain, and pandas parses it
+# on its C fast path. No string matches two of these, so the order only affects speed.
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S")
+
+
+def parse_date_column(s: pd.Series) -> pd.Series:
+    """Accept dd-mm-yyyy / yyyy-mm-dd / dd/mm/yyyy / yyyy/mm/dd or Excel serial/date objects.
+
+    Uploads repeat the same few dates across many rows, so only the distinct cell values
+    are parsed: one vectorised pass per format, stopping once all of them have parsed, then
+    Excel serials for the rest. Returns datetime.date / None.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s):
+        parsed = s
+    else:
+        codes, uniques = pd.factorize(s)   # empty cells get code -1
+        values = pd.Series(uniques, dtype=object)
+        # str() of a date/datetime cell matches the ISO formats above
+        text = values.astype(str).str.strip()
+        found = pd.Series(pd.NaT, index=values.index, dtype="datetime64[s]")
+        for fmt in _DATE_FORMATS:
+            if not found.isna().any():
+                break
+            found = found.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+
+        if found.isna().any():
+            # Excel serials, bounded to what a Timedelta can hold (~year 2192)
+            serial = pd.to_numeric(values, errors="coerce")
+            serial = serial.where(found.isna() & serial.between(0, pd.Timedelta.max.days))
+            found = found.fillna(pd.Timestamp("1899-12-30") + pd.to_timedelta(serial, unit="D"))
+
+        # back onto the rows; code -1 is not in found's index, so it reindexes to NaT
+        parsed = pd.Series(found.reindex(codes).to_numpy(), index=s.index)
+
+    return parsed.dt.date.astype(object).where(parsed.notna(), None)
 
 
 # -------------------------
@@ -48,28 +66,124 @@ def ensure_columns(df: pd.DataFrame, required: Iterable[str]) -> None:
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing required columns: {', '.join(sorted(missing))}")
 
-async def read_dataframe_any(file: UploadFile) -> pd.DataFrame:
-    name = (file.filename or "").lower()
-    content = await file.read()
-    if name.endswith((".xlsx", ".xlsm", ".xltx", ".xltm")):
-        df = pd.read_excel(BytesIO(content))
-    elif name.endswith(".csv"):
-        df = pd.read_csv(BytesIO(content))
+# Column-wise cleaners for the upload endpoints. Each returns an object Series aligned
+# with df.index holding None for empty cells (or when the column is absent), so the
+# cleaned frame can go straight into bulk_insert_mappings.
+def str_column(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    raw = df[col]
+    s = raw.astype(str).str.strip().astype(object)
+    return s.where(raw.notna() & (s != ""), None)
+
+def num_column(df: pd.DataFrame, col: str, cast=float) -> tuple[pd.Series, pd.Series]:
+    """Return (values, invalid_mask); invalid marks cells that are present but not numeric."""
+    if col not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object), pd.Series(False, index=df.index)
+    raw = df[col]
+    num = pd.to_numeric(raw, errors="coerce")
+    invalid = raw.notna() & num.isna()
+    return num.astype(object).where(num.notna(), None).map(lambda v: v if v is None else cast(v)), invalid
+
+def date_column(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    return parse_date_column(df[col])
+
+def row_errors(checks) -> tuple[pd.Series, list[str]]:
+    """Fold [(mask, reason), ...] into one "bad row" mask plus "Row N: reason" messages."""
+    bad, found = None, []
+    for mask, reason in checks:
+        bad = mask if bad is None else bad | mask
+        found.extend((i, reason) for i in mask.index[mask])
+    return bad, [f"Row {i+2}: {reason}" for i, reason in sorted(found)]
+
+# python-calamine (Rust) reads .xlsx several times faster than openpyxl; fall back to
+# openpyxl when it isn't installed.
+XLSX_ENGINE = "calamine" if find_spec("python_calamine") else "openpyxl"
+
+EXCEL_SUFFIXES = (".xlsx", ".xlsm", ".xltx", ".xltm")
+
+def upload_suffix(filename: str | None) -> str:
+    """Return the upload's file suffix, or 400 if it is not a type read_dataframe handles."""
+    name = (filename or "").lower()
+    for suffix in (*EXCEL_SUFFIXES, ".csv"):
+        if name.endswith(suffix):
+            return suffix
+    raise HTTPException(400, "Unsupported file type. Please upload .xlsx or .csv")
+
+def read_dataframe(source, filename: str | None, columns: Iterable[str] | None = None) -> pd.DataFrame:
+    """Read an .xlsx/.csv path or buffer; with `columns`, only those (case-insensitive) are parsed."""
+    suffix = upload_suffix(filename)
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda c: str(c).strip().lower() in wanted
+    if suffix == ".csv":
+        # everything as str: the column cleaners coerce types, and ids keep leading zeros
+        df = pd.read_csv(source, engine="c", dtype=str, usecols=usecols)
     else:
-        raise HTTPException(400, "Unsupported file type. Please upload .xlsx or .csv")
+        df = pd.read_excel(source, engine=XLSX_ENGINE, usecols=usecols)
     return df_normalize_columns(df)
 
 
 # -------------------------
-# Excel download
+# Excel / CSV download
 # -------------------------
-def excel_response(df: pd.DataFrame, filename: str) -> StreamingResponse:
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False)
+def iter_file(f, chunk_size: int = 64 * 1024):
+    try:
+        while chunk := f.read(chunk_size):
+            yield chunk
+    finally:
+        f.close()
+
+def excel_response(columns, rows, filename: str) -> StreamingResponse:
+    """Write header + row tuples as they arrive (pair with yield_per) and stream the file back."""
+    buf = SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    # constant_memory: xlsxwriter flushes each row once the next one starts instead of
+    # keeping the whole sheet as cell objects; the .xlsx itself spills to disk past 8 MB.
+    # Cell values are data, never formulas or links, so skip the per-string "=..." and URL
+    # checks; a NaN/Inf float is written as an error cell instead of raising mid-export.
+    wb = xlsxwriter.Workbook(
+        buf,
+        {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd",
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "nan_inf_to_errors": True,
+        },
+    )
+    ws = wb.add_worksheet()
+    ws.write_row(0, 0, list(columns))
+    for i, row in enumerate(rows, start=1):
+        ws.write_row(i, 0, row)
+    wb.close()
     buf.seek(0)
     return StreamingResponse(
-        buf,
+        iter_file(buf),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
+
+
+def csv_response(columns, rows, filename: str) -> StreamingResponse:
+    buf = SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", newline="")
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(rows)
+    buf.seek(0)
+    return StreamingResponse(
+        iter_file(buf),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def export_response(db: Session, columns, basename: str, format: str = "xlsx") -> StreamingResponse:
+    """Stream `columns` of every row as <basename>.csv or <basename>.xlsx."""
+    # rows go straight from the cursor into the writer, 1000 at a time
+    result = db.execute(select(*columns).execution_options(yield_per=1000))
+    if format == "csv":
+        return csv_response(result.keys(), result, f"{basename}.csv")
+    return excel_response(result.keys(), result, f"{basename}.xlsx")